@@ -0,0 +1,338 @@
+import functools
+import os
+import os.path
+import select
+import signal
+import socket
+import time
+
+
+def find_program_pid(program):
+    """Find the pid of a running program by scanning /proc.
+
+    Reads /proc/<pid>/comm directly instead of shelling out to pidof,
+    which would fork+exec a new process on every liveness check.
+    """
+    comm = program.encode("ascii") + b"\n"
+    for entry in os.scandir('/proc'):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(os.path.join('/proc', entry.name, 'comm'), 'rb') as f:
+                if f.read(16) == comm:
+                    return int(entry.name)
+        except OSError:
+            # process exited mid-scan or is not readable
+            continue
+    return None
+
+
+def program_running(program):
+    return find_program_pid(program) is not None
+
+
+@functools.cache
+def resolve_socket_path():
+    """Locate the cmus control socket.
+
+    Cached so the environ lookups and stat syscalls only happen on the
+    first (re)connect, not every time a socket is opened.
+    """
+    candidates = []
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        candidates.append(os.path.join(runtime_dir, 'cmus-socket'))
+    home = os.environ.get('HOME')
+    if home:
+        candidates.append(os.path.join(home, '.cmus', 'socket'))
+    for f in candidates:
+        try:
+            os.stat(f)
+        except FileNotFoundError:
+            continue
+        return f
+    raise RuntimeError("cmus is running, but its socket is not found")
+
+
+class CmusPlayer:
+    process_name = "cmus"  # matched against /proc/<pid>/comm
+    friendly_name = "cmus"  # used for display in help
+    status_cache_ttl = 0.02  # seconds
+    # large enough that a whole playlist batch normally fits in one
+    # kernel buffer copy
+    send_buffer_size = 64 * 1024
+    # prebuilt bytes for the fixed commands, so the hot path skips a
+    # str.encode per call
+    _CMDS = {cmd: (cmd + "\n").encode("ascii")
+             for cmd in ("status", "player-play", "player-pause",
+                         "player-stop", "player-next", "player-prev")}
+
+    def __init__(self):
+        self._pidfd = None
+        self._path = None
+        self._socket = None
+        self._status_cache = (None, 0.0)
+
+    # socket
+    def create_socket(self):
+        s = socket.socket(socket.AF_UNIX,
+                          socket.SOCK_STREAM | socket.SOCK_NONBLOCK)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF,
+                     self.send_buffer_size)
+        return s
+
+    def connect_socket(self, socket):
+        try:
+            socket.connect(self.socket_path())
+        except FileNotFoundError:
+            # the cached path went stale (cmus was restarted with a
+            # different runtime dir); re-resolve once
+            self._path = None
+            resolve_socket_path.cache_clear()
+            socket.connect(self.socket_path())
+
+    def _encode(self, command):
+        return self._CMDS.get(command) or (command + "\n").encode("ascii")
+
+    def _send(self, s, data):
+        """Write the whole buffer, waiting out EAGAIN on the
+        non-blocking socket.
+
+        This is sendall() rewritten for SOCK_NONBLOCK: plain send() may
+        accept only part of a long command (e.g. 'add /very/long/path')
+        and silently truncate it, and sendall() loses track of how much
+        was written if it raises mid-buffer. The memoryview loop
+        guarantees every byte is delivered.
+        """
+        view = memoryview(data)
+        while view:
+            try:
+                sent = s.send(view)
+            except BlockingIOError:
+                select.select([], [s], [])
+                continue
+            view = view[sent:]
+
+    def _drain(self, s):
+        """Discard stale replies queued up by fire-and-forget
+        commands."""
+        try:
+            while s.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _send_retry(self, data):
+        """Write to the cached socket, reconnecting once if the peer
+        went away (cmus restarted, connection reset)."""
+        try:
+            self._send(self.get_open_socket(), data)
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            self._reset_socket()
+            self._send(self.get_open_socket(), data)
+        return self._socket
+
+    def _send_only(self, command):
+        """Fire a command without waiting for a reply.
+
+        Mutation commands (player-play, seek, vol, ...) return nothing
+        useful, so blocking on recv only serves to stall the audio
+        service.
+        """
+        self._send_retry(self._encode(command))
+
+    def _send_recv(self, command, decode=False):
+        """Send a query and wait briefly for its reply.
+
+        Returns raw bytes unless ``decode`` is set; hot-path callers
+        (the status predicates) scan the bytes directly and never pay
+        for a utf-8 decode.
+        """
+        if self._socket is not None:
+            self._drain(self._socket)
+        s = self._send_retry(self._encode(command))
+        # We never know how much to receive, most of these
+        # protocols send very little data back for the commands
+        # we use.
+        # Usually we are getting back ASCII.
+        reply = b''
+        if select.select([s], [], [], 0.05)[0]:
+            try:
+                reply = s.recv(4096)
+            except BlockingIOError:
+                pass
+        return reply.decode('utf-8') if decode else reply
+
+    def send_socket_command(self, command):
+        return self._send_recv(command, decode=True)
+
+    def send_socket_commands(self, commands):
+        """Send several commands in one socket write.
+
+        cmus reads its control socket line by line, so a batch of
+        newline-separated commands costs a single send instead of
+        one per command.
+        """
+        self._send_retry(("\n".join(commands) + "\n").encode("ascii"))
+        self._invalidate_status()
+
+    def get_open_socket(self):
+        if self._socket is not None:
+            return self._socket
+        s = self.create_socket()
+        self.connect_socket(s)
+        self._socket = s
+        return s
+
+    def _reset_socket(self):
+        if self._socket is not None:
+            try:
+                self._socket.close()
+            except OSError:
+                pass
+            self._socket = None
+
+    def close(self):
+        """Release the cached socket and pidfd so instances don't leak
+        file descriptors."""
+        self._reset_socket()
+        if self._pidfd is not None:
+            os.close(self._pidfd)
+            self._pidfd = None
+
+    def socket_path(self):
+        if self._path is None:
+            self._path = resolve_socket_path()
+        return self._path
+
+    # player
+    def is_running(self):
+        """
+        Returns true if the player program is running.
+        Must be implemented (or process_name must be specified)
+        """
+        if self._pidfd is not None:
+            try:
+                # signal 0 tests liveness without delivering anything
+                signal.pidfd_send_signal(self._pidfd, 0)
+                return True
+            except ProcessLookupError:
+                os.close(self._pidfd)
+                self._pidfd = None
+        pid = find_program_pid(self.process_name)
+        if pid is None:
+            return False
+        try:
+            # cache a pidfd so later checks are a single syscall
+            self._pidfd = os.pidfd_open(pid)
+        except ProcessLookupError:
+            return False
+        return True
+
+    def _invalidate_status(self):
+        self._status_cache = (None, 0.0)
+
+    def _status_bytes(self):
+        """Fetch the raw cmus status reply.
+
+        The reply is cached for a few milliseconds so back-to-back
+        queries (toggle_pause, play_pause, ...) share a single socket
+        round-trip instead of re-sending 'status' each time.
+        """
+        reply, ts = self._status_cache
+        if reply is not None and \
+                time.monotonic() - ts < self.status_cache_ttl:
+            return reply
+        reply = self._send_recv('status')
+        self._status_cache = (reply, time.monotonic())
+        return reply
+
+    def _get_status(self):
+        """Parse the status reply into a dict, for callers that need
+        structured fields (duration, position, tags, ...)."""
+        status = {}
+        for line in self._status_bytes().decode('utf-8').splitlines():
+            key, _, value = line.partition(' ')
+            if key:
+                status[key] = value
+        return status
+
+    # the predicates test the undecoded reply; bytes-in-bytes search
+    # runs on CPython's memchr/memcmp fast path and allocates nothing
+    def is_stopped(self):
+        return b'status stopped' in self._status_bytes()
+
+    def is_paused(self):
+        return b'status paused' in self._status_bytes()
+
+    def is_playing(self):
+        return b'status playing' in self._status_bytes()
+
+    def add_path(self, paths):
+        """Add files/dirs/urls/playlists.
+
+        Accepts a single path or an iterable of paths; the whole batch
+        goes out as one socket write, one 'add' per line.
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+        self.send_socket_commands([f'add {path}' for path in paths])
+
+    def play(self):
+        self._send_only('player-play')
+        self._invalidate_status()
+
+    def pause(self):
+        self._send_only("player-pause")
+        self._invalidate_status()
+
+    def unpause(self):
+        self.pause()
+
+    def stop(self):
+        self._send_only("player-stop")
+        self._invalidate_status()
+
+    def next(self):
+        self._send_only("player-next")
+        self._invalidate_status()
+
+    def prev(self):
+        self._send_only("player-prev")
+        self._invalidate_status()
+
+    def seek_to_position(self, seconds):
+        self._send_only(f"seek {seconds}")
+        self._invalidate_status()
+
+    def seek_forward(self, n=5):
+        self._send_only(f"seek +{n}")
+        self._invalidate_status()
+
+    def seek_backward(self, n=5):
+        self._send_only(f"seek -{n}")
+        self._invalidate_status()
+
+    def increase_volume(self, n=20):
+        self._send_only(f"vol +{n}%")
+
+    def lower_volume(self, n=20):
+        self._send_only(f"vol -{n}%")
+
+    def toggle_pause(self):
+        """
+        Plays if paused, pauses if playing.
+        """
+        if self.is_paused():
+            self.unpause()
+        else:
+            self.pause()
+
+    def play_pause(self):
+        """
+        Plays if stopped/paused, pauses if playing.
+        """
+        if self.is_stopped():
+            self.play()
+        else:
+            self.toggle_pause()